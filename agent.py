@@ -8,21 +8,66 @@ The agent maintains conversation context, handles tool calls automatically,
 and provides a user-friendly interface for multi-turn conversations.
 """
 
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import hashlib
+import html.parser
+import importlib.util
+import json
 import os
+import re
+import sqlite3
 import sys
+import threading
+import time
+from collections import deque
 from pathlib import Path
-from typing import Dict, Any, List, cast
+from types import MappingProxyType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Tuple,
+    cast,
+)
 
 try:
     from dotenv import load_dotenv  # type: ignore[import]
 except ImportError:  # pragma: no cover - optional dependency
     load_dotenv = None  # type: ignore[assignment]
 
-import ollama
-from ollama import chat, ChatResponse, Message, ResponseError, RequestError
+try:
+    import orjson  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
 
-# Define available tools as a constant for easier configuration
-AVAILABLE_TOOLS = [ollama.web_search, ollama.web_fetch]
+try:
+    from cachetools import TTLCache  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional dependency
+    TTLCache = None  # type: ignore[assignment,misc]
+
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional dependency
+    SelectolaxParser = None  # type: ignore[assignment,misc]
+
+try:
+    import zstandard  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:  # The SDK itself is imported lazily, see _lazy_ollama()
+    from ollama import AsyncClient, ChatResponse, Client, Message
 
 
 def _load_env_file_fallback(env_path: Path) -> bool:
@@ -58,112 +103,1073 @@ else:
         print("Install with: pip install python-dotenv")
 
 
-def message_to_dict(message) -> Dict[str, Any]:
-    """Convert a Message object to a dictionary for the conversation history."""
+# Names of the Ollama SDK tool functions offered to the model, in schema order
+AVAILABLE_TOOLS = ("web_search", "web_fetch")
+
+# How long the server keeps the model loaded after each request, so it is not
+# unloaded while the user reads an answer or types the next question
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Seconds to wait on the Ollama server before giving up on a request; unset
+# waits indefinitely, since loading a model can take minutes
+CLIENT_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT") or 0) or None
+
+# HTTP/2 multiplexes tool requests to ollama.com over one pooled connection;
+# httpx only supports it when the optional h2 package is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Warm the server's prompt cache with finished tool results while other tool
+# calls from the same turn are still running (set to 0 to disable)
+SPECULATIVE_PREFILL = os.getenv("OLLAMA_SPECULATIVE_PREFILL", "1") != "0"
+
+# Lets the model fan out independent sub-questions in a single turn, which the
+# agent then executes concurrently, instead of one tool call per round trip
+SYSTEM_PROMPT = (
+    "When sub-questions are independent, emit all tool_calls in a single "
+    "assistant message; do not serialize them across turns."
+)
+
+# Once the history exceeds this many characters, everything but the system
+# prompt, the newest messages and the current step is folded into a summary
+HISTORY_CHAR_BUDGET = int(os.getenv("OLLAMA_HISTORY_BUDGET", "32000"))
+HISTORY_KEEP_MESSAGES = int(os.getenv("OLLAMA_HISTORY_KEEP", "6"))
+
+SUMMARY_PROMPT = (
+    "Summarize the following conversation excerpt in a few sentences. Keep "
+    "facts, figures, sources and open questions; drop everything else."
+)
+
+# Used to strip web_fetch pages down to the text a reader would see. Only whole
+# documents are parsed; markdown that merely quotes HTML is left untouched
+_HTML_DOCUMENT = re.compile(r"\s*<(?:!doctype|html)\b", re.I)
+_HIDDEN_TAGS = ("script", "style", "noscript", "template", "svg", "title")
+_BLOCK_TAGS = frozenset(
+    {"p", "div", "br", "li", "tr", "section", "article", "h1", "h2", "h3", "h4"}
+)
+
+# Hard cap on stored messages (besides the system prompt). Reaching it would
+# drop the oldest message on every append, shifting the prompt prefix so the
+# KV cache is never reused, so compact_history() kicks in at half this count
+MAX_HISTORY_MESSAGES = 256
+
+# Character limits for tool results sent to the model and shown to the user
+TOOL_RESULT_LIMIT = 8000  # Prevents context window overflow
+PREVIEW_LIMIT = 200
+
+# Tool results are cached so repeated identical calls skip the network
+TOOL_CACHE_SIZE = 256
+# Seconds; lets search results for news refresh eventually
+TOOL_CACHE_TTL = int(os.getenv("OLLAMA_TOOL_CACHE_TTL", "600"))
+
+# Results are also persisted here so they survive restarts (empty disables it)
+TOOL_CACHE_PATH = os.getenv(
+    "OLLAMA_TOOL_CACHE",
+    str(Path.home() / ".cache" / "ollama-agent" / "tools.sqlite"),
+)
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"  # Marks compressed values in the database
+
+# Shared by every conversation in the process; keys are "<tool>:<json args>"
+_TOOL_CACHE: Any = (
+    TTLCache(maxsize=TOOL_CACHE_SIZE, ttl=TOOL_CACHE_TTL) if TTLCache else {}
+)
+_TOOL_CACHE_LOCK = threading.Lock()
+_MISSING = object()
+
+# The on-disk cache, opened by the first tool call (None once disabled)
+_PERSISTENT_CACHE: Any = _MISSING
+_PERSISTENT_CACHE_LOCK = threading.Lock()
+
+
+def _lazy_ollama():
+    """Import the Ollama SDK on first use.
+
+    The SDK pulls in httpx and pydantic, so deferring the import keeps
+    ``--help`` and the startup banner from waiting on it.
+    """
+    import ollama
+
+    return ollama
+
+
+def message_to_dict(message, *, tool_calls: Any = _MISSING) -> Dict[str, Any]:
+    """Convert a Message object to a dictionary for the conversation history.
+
+    Callers that already read ``message.tool_calls`` can pass it in to avoid
+    a second attribute lookup.
+    """
 
     result = {
         "role": getattr(message, "role", "assistant"),
         "content": getattr(message, "content", "") or "",
     }
 
-    if hasattr(message, "thinking") and message.thinking:
-        result["thinking"] = message.thinking
+    # One getattr per optional field instead of a hasattr probe plus a load
+    thinking = getattr(message, "thinking", None)
+    if thinking:
+        result["thinking"] = thinking
 
-    if hasattr(message, "tool_calls") and message.tool_calls:
+    if tool_calls is _MISSING:
+        tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
         result["tool_calls"] = [
-            {
-                "function": {
-                    "name": tc.function.name,
-                    "arguments": tc.function.arguments,
-                }
-            }
-            for tc in message.tool_calls
+            {"function": {"name": fn.name, "arguments": fn.arguments}}
+            for tc in tool_calls
+            for fn in (tc.function,)
         ]
 
-    if hasattr(message, "tool_name") and message.tool_name:
-        result["tool_name"] = message.tool_name
+    tool_name = getattr(message, "tool_name", None)
+    if tool_name:
+        result["tool_name"] = tool_name
 
     return result
 
 
-def get_chat_response(
+def _dumps(obj: Any) -> str:
+    """Serialize to canonical JSON (sorted keys, no whitespace).
+
+    Uses orjson's C encoder when it is installed and the standard library
+    otherwise; both produce the same text for JSON-native values.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS).decode()
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON produced by _dumps()."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class PersistentToolCache:
+    """Tool results stored in SQLite so they survive process restarts.
+
+    Entries are keyed by a BLAKE2b digest of the tool name and its canonical
+    JSON arguments, so argument order never causes a miss. Values are the
+    JSON-encoded results, zstd-compressed when zstandard is installed, and
+    are treated as missing once they are older than ``ttl`` seconds. SDK
+    response models are stored with their class name and rebuilt on read, so
+    a hit returns the same type (and renders the same text) as a fresh call.
+    Database errors are never fatal; the cache just behaves as empty.
+    """
+
+    def __init__(self, path: Path, ttl: int = TOOL_CACHE_TTL):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        # Tools run on worker threads, so the connection is shared under a lock
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tools(k BLOB PRIMARY KEY, v BLOB, ts INTEGER)"
+        )
+        self._db.execute("DELETE FROM tools WHERE ts <= ?", (self._cutoff(),))
+
+    def _cutoff(self) -> int:
+        return int(time.time()) - self._ttl
+
+    @staticmethod
+    def key(tool_name: str, canonical_args: str) -> bytes:
+        """Return the digest identifying one tool call."""
+        data = tool_name.encode() + b"\0" + canonical_args.encode()
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def get(self, key: bytes) -> Any:
+        """Return the cached result for ``key``, or _MISSING."""
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT v FROM tools WHERE k = ? AND ts > ?", (key, self._cutoff())
+                ).fetchone()
+        except sqlite3.Error:
+            return _MISSING
+        if row is None:
+            return _MISSING
+
+        value = row[0]
+        if value[:4] == _ZSTD_MAGIC and zstandard is None:
+            return _MISSING  # Written by an install that had zstandard
+        try:
+            if value[:4] == _ZSTD_MAGIC:
+                value = zstandard.ZstdDecompressor().decompress(value)
+            model_name, result = _loads(value)
+            if model_name is None:
+                return result
+            return getattr(_lazy_ollama(), model_name).model_validate(result)
+        except Exception:  # Corrupt or outdated entries behave like misses
+            return _MISSING
+
+    def put(self, key: bytes, result: Any) -> None:
+        """Store a tool result as a [model class name or None, value] pair."""
+        model_name = None
+        if hasattr(result, "model_dump"):
+            model_name = type(result).__name__
+            result = result.model_dump()
+        try:
+            value = _dumps([model_name, result]).encode()
+        except TypeError:
+            return  # Not JSON-serializable; keep it in memory only
+        if zstandard is not None:
+            value = zstandard.ZstdCompressor().compress(value)
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO tools(k, v, ts) VALUES (?, ?, ?)",
+                    (key, value, int(time.time())),
+                )
+        except sqlite3.Error:
+            pass
+
+
+def _persistent_tool_cache() -> PersistentToolCache | None:
+    """Open the on-disk tool cache on first use (None if disabled or broken).
+
+    Tool threads ask for it concurrently, so it is opened under a lock and
+    exactly once. A database that is merely locked by another process is
+    retried on the next call instead of disabling the cache for the session.
+    """
+    global _PERSISTENT_CACHE
+
+    with _PERSISTENT_CACHE_LOCK:
+        if _PERSISTENT_CACHE is not _MISSING:
+            return _PERSISTENT_CACHE
+
+        cache = None
+        if TOOL_CACHE_PATH:
+            try:
+                cache = PersistentToolCache(Path(TOOL_CACHE_PATH).expanduser())
+            except (OSError, sqlite3.Error) as exc:
+                if "locked" in str(exc):
+                    return None  # Busy for now; the next tool call tries again
+                print(f"⚠️  Tool result cache disabled: {exc}")
+        _PERSISTENT_CACHE = cache
+        return cache
+
+
+def memoize_json(fn):
+    """Cache a tool's results keyed on its JSON-normalized arguments.
+
+    Tool arguments arrive as dicts, which are unhashable, so the key is their
+    JSON encoding with sorted keys. With cachetools installed entries expire
+    after TOOL_CACHE_TTL seconds; otherwise the oldest entry is evicted once
+    TOOL_CACHE_SIZE is reached. Misses fall through to the on-disk
+    PersistentToolCache before calling the tool. Failed calls are not cached.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(**kwargs):
+        canonical_args = _dumps(kwargs)
+        key = f"{fn.__name__}:{canonical_args}"
+        with _TOOL_CACHE_LOCK:
+            result = _TOOL_CACHE.get(key, _MISSING)
+        if result is not _MISSING:
+            return result
+
+        persistent = _persistent_tool_cache()
+        digest = PersistentToolCache.key(fn.__name__, canonical_args)
+        result = persistent.get(digest) if persistent else _MISSING
+        if result is _MISSING:
+            result = fn(**kwargs)
+            if persistent:
+                persistent.put(digest, result)
+
+        with _TOOL_CACHE_LOCK:
+            if TTLCache is None and len(_TOOL_CACHE) >= TOOL_CACHE_SIZE:
+                del _TOOL_CACHE[next(iter(_TOOL_CACHE))]
+            _TOOL_CACHE[key] = result
+        return result
+
+    return wrapper
+
+
+def _repr_items(
+    opening: str, closing: str, entries: Iterable[Tuple[str, Any]]
+) -> Iterator[Tuple[bool, Any]]:
+    """Yield the pieces of a container repr as (is_literal_text, item) pairs."""
+
+    yield True, opening
+    for index, (prefix, value) in enumerate(entries):
+        yield True, f", {prefix}" if index else prefix
+        yield False, value
+    yield True, closing
+
+
+def _result_content(result: Any) -> str | None:
+    """Return the ``content`` string of a tool result, if it has one."""
+    if isinstance(result, Mapping):
+        content = result.get("content")
+    else:
+        content = getattr(result, "content", None)
+    return content if isinstance(content, str) else None
+
+
+class _VisibleTextParser(html.parser.HTMLParser):
+    """Collect the text of an HTML page that a reader would actually see."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._hidden_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _HIDDEN_TAGS:
+            self._hidden_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _HIDDEN_TAGS and self._hidden_depth:
+            self._hidden_depth -= 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._hidden_depth:
+            self.parts.append(data)
+
+
+def extract_visible_text(page: str) -> str:
+    """Reduce an HTML page to its visible text and headings.
+
+    Scripts, styles and other invisible elements are dropped and whitespace is
+    collapsed, so the truncated tool result spends its characters on content
+    instead of markup. Uses selectolax's C parser when it is installed and the
+    standard library parser otherwise. Text that is not an HTML document (such
+    as the markdown the hosted web_fetch returns) is returned as is.
+    """
+    if not _HTML_DOCUMENT.match(page):
+        return page
+
+    if SelectolaxParser is not None:
+        tree = SelectolaxParser(page)
+        for node in tree.css(",".join(_HIDDEN_TAGS)):
+            node.decompose()
+        root = tree.body or tree.root
+        text = root.text(separator="\n") if root is not None else ""
+    else:
+        parser = _VisibleTextParser()
+        parser.feed(page)
+        parser.close()
+        text = "".join(parser.parts)
+
+    text = re.sub(r"[ \t\r\f\v]+", " ", text)
+    return re.sub(r"\s*\n\s*", "\n", text).strip()
+
+
+def truncate_repr(obj: Any, limit: int = TOOL_RESULT_LIMIT) -> str:
+    """Render a tool result as text of at most ``limit`` characters.
+
+    Unlike ``str(result)[:limit]`` this never builds the full representation
+    of a large result. Dicts, lists and pydantic models are walked lazily with
+    an explicit stack, strings are sliced before they are copied, and the walk
+    stops as soon as ``limit`` characters have been produced. Results with a
+    ``content`` string (such as web_fetch pages) are reduced to that content.
+    """
+    content = _result_content(obj)
+    if content is not None:
+        return content[:limit]
+
+    parts: List[str] = []
+    size = 0
+    stack: List[Iterator[Tuple[bool, Any]]] = [iter([(False, obj)])]
+
+    while stack and size < limit:
+        entry = next(stack[-1], None)
+        if entry is None:  # Current container is exhausted
+            stack.pop()
+            continue
+
+        is_literal, item = entry
+        if is_literal:
+            text = item
+        elif isinstance(item, str):
+            text = repr(item[: limit - size])
+        elif isinstance(item, Mapping):
+            stack.append(
+                _repr_items("{", "}", ((f"{k!r}: ", v) for k, v in item.items()))
+            )
+            continue
+        elif isinstance(item, (list, tuple)):
+            stack.append(_repr_items("[", "]", (("", v) for v in item)))
+            continue
+        elif hasattr(type(item), "model_fields"):  # pydantic model
+            model = type(item)
+            fields = [(f"{name}=", getattr(item, name)) for name in model.model_fields]
+            stack.append(_repr_items(f"{model.__name__}(", ")", fields))
+            continue
+        else:
+            text = repr(item)
+
+        parts.append(text)
+        size += len(text)
+
+    return "".join(parts)[:limit]
+
+
+def freeze_message(message: Dict[str, Any]) -> Mapping[str, Any]:
+    """Return a read-only view of a conversation history entry.
+
+    Ollama only reuses its KV cache for a prompt prefix that is identical to
+    the previous request, so messages must never change once they have been
+    sent to the model.
+    """
+    return MappingProxyType(message)
+
+
+def _echo_labels() -> Tuple[str, str, str]:
+    """Return the thinking/response/question labels, in ASCII if stdout is not UTF-8."""
+    encoding = (sys.stdout.encoding or "").lower().replace("-", "")
+    if encoding == "utf8":
+        return "🤔 Thinking:", "💬 Response:", "❓"
+    return "[think]", "[resp]", "[ask]"
+
+
+async def _accumulate_streaming_response(
+    stream: AsyncIterator[ChatResponse], *, echo: bool = False
+) -> ChatResponse:
+    """Merge streamed chat chunks into a single ChatResponse.
+
+    Content and thinking deltas are concatenated and tool calls from every
+    chunk are collected. Metadata (done reason, token counts, timings) is taken
+    from the final chunk, which is the only one that carries it.
+
+    Args:
+        stream: Async iterator of ChatResponse chunks from chat(stream=True)
+        echo: Print thinking and content to stdout as the chunks arrive
+
+    Returns:
+        ChatResponse whose message holds the complete assistant turn
+
+    Raises:
+        RuntimeError: If the stream produced no chunks
+    """
+    content_parts: List[str] = []
+    thinking_parts: List[str] = []
+    tool_calls: List[Message.ToolCall] = []
+    last_chunk: ChatResponse | None = None
+    section: str | None = None  # Label of the section currently being echoed
+    thinking_label, response_label, _ = _echo_labels()
+
+    def emit(parts: List[str], label: str, text: str) -> None:
+        nonlocal section
+        if section != label:
+            # Start a new labelled section, ending the previous line if needed
+            parts.append(f"\n{label} " if section else f"{label} ")
+            section = label
+        parts.append(text)
+
+    async for chunk in stream:
+        last_chunk = chunk
+        delta = chunk.message
+        parts: List[str] = []  # Echoed text for this chunk, written at once
+
+        if delta.thinking:
+            thinking_parts.append(delta.thinking)
+            if echo:
+                emit(parts, thinking_label, delta.thinking)
+
+        if delta.content:
+            content_parts.append(delta.content)
+            if echo:
+                emit(parts, response_label, delta.content)
+
+        if delta.tool_calls:
+            tool_calls.extend(delta.tool_calls)
+
+        if parts:
+            sys.stdout.write("".join(parts))
+            sys.stdout.flush()
+
+    if section:
+        sys.stdout.write("\n")  # Finish the last echoed line
+
+    if last_chunk is None:
+        raise RuntimeError("No chunk with 'message' produced by chat()")
+
+    message = _lazy_ollama().Message(
+        role=last_chunk.message.role or "assistant",
+        content="".join(content_parts),
+        thinking="".join(thinking_parts) or None,
+        tool_calls=tool_calls or None,
+    )
+    return last_chunk.model_copy(update={"message": message})
+
+
+async def get_chat_response(
+    client: AsyncClient,
     *,
     model: str,
-    messages: List[Dict[str, Any]],
+    messages: List[Mapping[str, Any]],
     tools,
     think: bool = True,
+    echo: bool = False,
 ) -> ChatResponse:
-    """Call ollama.chat ensuring a concrete ChatResponse is returned.
+    """Stream a chat completion and return it as a single ChatResponse.
 
-    The Ollama chat API can return either a ChatResponse (non-streaming) or an
-    iterator of ChatResponse chunks (streaming). Some static type checkers get
-    confused and think it always returns a generator. This wrapper ensures we
-    always get a single ChatResponse object.
+    Streaming gets the first token back as soon as it is generated instead of
+    waiting for the server to buffer the whole reply, while callers still work
+    with one complete ChatResponse object.
 
     Args:
+        client: Async Ollama client used for the request
         model: Name of the Ollama model to use (e.g., "gpt-oss")
         messages: List of conversation messages in chat format
         tools: List of available tools (web_search, web_fetch, etc.)
         think: Whether to enable internal reasoning/thinking mode
+        echo: Print thinking and content incrementally as they stream in
 
     Returns:
         Single ChatResponse object with message and metadata
 
     Raises:
-        RuntimeError: If chat() returns unexpected type or no message
+        ConnectionError: If the Ollama server cannot be reached
+        RuntimeError: If the stream produced no chunks
+    """
+    import httpx  # Installed with the SDK, so also imported lazily
+
+    try:
+        stream = await client.chat(
+            model=model,
+            messages=messages,
+            tools=tools,
+            think=think,
+            stream=True,
+            keep_alive=KEEP_ALIVE,
+        )
+        return await _accumulate_streaming_response(stream, echo=echo)
+    except httpx.ConnectError as exc:
+        # The SDK only maps this to ConnectionError for non-streaming requests
+        raise ConnectionError("Failed to connect to Ollama.") from exc
+
+
+async def warm_model(model: str) -> None:
+    """Load the model on the server ahead of the first chat request.
+
+    An empty generate request only loads the weights (for KEEP_ALIVE), so the
+    load overlaps with the user typing their question. Failures are ignored;
+    the first real request reports connection problems properly.
+    """
+    ollama = _lazy_ollama()
+    client = ollama.AsyncClient(host=os.getenv("OLLAMA_HOST"), timeout=CLIENT_TIMEOUT)
+    with contextlib.suppress(Exception):
+        await client.generate(model=model, prompt="", keep_alive=KEEP_ALIVE)
+
+
+async def prefill_prompt(
+    client: AsyncClient,
+    *,
+    model: str,
+    messages: List[Mapping[str, Any]],
+    tools,
+    think: bool = True,
+) -> None:
+    """Have Ollama process a prompt now so a longer follow-up request reuses it.
+
+    Generating a single token makes the server evaluate the whole prompt and
+    keep it in its KV cache. A later request whose messages start with these
+    same messages then only has to prefill the new ones. Failures are ignored
+    because the follow-up request does the full work anyway.
+    """
+    with contextlib.suppress(Exception):
+        await client.chat(
+            model=model,
+            messages=messages,
+            tools=tools,
+            think=think,
+            stream=False,
+            options={"num_predict": 1},
+            keep_alive=KEEP_ALIVE,
+        )
+
+
+def history_chars(messages: Iterable[Mapping[str, Any]]) -> int:
+    """Return the size of a history as the model sees it (content and thinking)."""
+    return sum(
+        len(m.get("content") or "") + len(m.get("thinking") or "") for m in messages
+    )
+
+
+async def compact_history(
+    client: AsyncClient, *, model: str, messages: List[Mapping[str, Any]]
+) -> List[Mapping[str, Any]]:
+    """Fold older messages into a summary once the history grows too large.
+
+    The history is too large once it exceeds HISTORY_CHAR_BUDGET characters or
+    half of MAX_HISTORY_MESSAGES messages; the latter keeps the deque holding
+    the history from ever reaching its cap and silently dropping messages.
+    Keeps the system prompt, the latest user question and the whole current
+    step (the newest user or assistant message plus the tool results that
+    follow it) verbatim, along with up to HISTORY_KEEP_MESSAGES recent messages
+    that fit in half of HISTORY_CHAR_BUDGET. Everything else is replaced by a
+    single system message written by one non-streaming chat() call. Compacting
+    well below the budget leaves room for several more turns before the next
+    summary, so its cost and the lost prompt-cache prefix are paid rarely.
+
+    Returns:
+        The original list if it is within budget or the summary request
+        failed, otherwise a new one
     """
-    # Call Ollama chat API with explicit non-streaming mode
-    result = chat(
-        model=model,
-        messages=messages,
-        tools=tools,
-        think=think,
-        stream=False,  # Force non-streaming to get single response
+    if (
+        history_chars(messages) <= HISTORY_CHAR_BUDGET
+        and len(messages) <= MAX_HISTORY_MESSAGES // 2
+    ):
+        return messages
+
+    # The current step starts at the last message that is not a tool result
+    step_start = len(messages) - 1
+    while step_start > 0 and messages[step_start]["role"] == "tool":
+        step_start -= 1
+
+    # Extend the kept tail backwards while it stays under the low-water mark
+    low_water = HISTORY_CHAR_BUDGET // 2
+    cut = step_start
+    kept_chars = history_chars(messages[cut:])
+    while cut > 1 and len(messages) - cut < HISTORY_KEEP_MESSAGES:
+        size = history_chars(messages[cut - 1 : cut])
+        if kept_chars + size > low_water:
+            break
+        cut -= 1
+        kept_chars += size
+
+    # Never keep tool results without the assistant message that requested them
+    while cut < step_start and messages[cut]["role"] == "tool":
+        cut += 1
+    if cut <= 1:
+        return messages
+
+    # The question being worked on stays verbatim even when its step is old
+    question_index = max(
+        (i for i in range(1, cut) if messages[i]["role"] == "user"),
+        default=None,
     )
+    if question_index is not None and any(m["role"] == "user" for m in messages[cut:]):
+        question_index = None  # A newer question is already kept
+    kept = [messages[question_index]] if question_index is not None else []
 
-    # Normal case: result is a ChatResponse with .message attribute
-    if hasattr(result, "message"):
-        return cast(ChatResponse, result)
+    elided = [m for i, m in enumerate(messages[1:cut], 1) if i != question_index]
+    if all(m["role"] == "system" for m in elided):
+        return messages  # Nothing new to fold into the existing summary
 
-    # Defensive fallback: if result is unexpectedly an iterator (streaming mode)
-    # This shouldn't happen with stream=False, but handle it gracefully
+    transcript = "\n\n".join(
+        f"{m.get('tool_name') or m['role']}: {m.get('content') or ''}" for m in elided
+    )
     try:
-        iterator = iter(result)  # type: ignore[assignment]
-    except TypeError as exc:  # pragma: no cover
-        raise RuntimeError("Unexpected chat() return type without 'message'") from exc
-
-    # Consume iterator to find the last chunk containing a message
-    last_with_message: ChatResponse | None = None
-    for chunk in iterator:  # type: ignore[assignment]
-        if hasattr(chunk, "message"):
-            last_with_message = chunk  # type: ignore[assignment]
-
-    # Ensure we found at least one chunk with a message
-    if last_with_message is None:  # pragma: no cover
-        raise RuntimeError("No chunk with 'message' produced by chat()")
+        response = cast(
+            "ChatResponse",
+            await client.chat(
+                model=model,
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": transcript},
+                ],
+                stream=False,
+                keep_alive=KEEP_ALIVE,
+            ),
+        )
+    except Exception:
+        # Compaction is only an optimization; the real request reports errors
+        return messages
+    print(f"🗜️  Summarized {len(elided)} earlier messages to keep the prompt short")
+
+    summary = freeze_message(
+        {
+            "role": "system",
+            "content": "Summary of the earlier conversation: "
+            + (response.message.content or ""),
+        }
+    )
+    return [messages[0], summary, *kept, *messages[cut:]]
+
+
+async def _ainput(prompt: str) -> str:
+    """Read a line from stdin without blocking the event loop.
+
+    The read runs on a daemon thread so that Ctrl+C cancels the waiting
+    coroutine right away. A worker from asyncio's default executor would keep
+    the interpreter alive until the user pressed Enter.
+    """
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future[str] = loop.create_future()
+
+    def deliver(line: str, error: BaseException | None) -> None:
+        if future.done():  # The prompt was abandoned (e.g. Ctrl+C)
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(line)
+
+    def read_line() -> None:
+        line, error = "", None
+        try:
+            line = input(prompt)
+        except Exception as exc:  # EOFError etc.
+            error = exc
+        with contextlib.suppress(RuntimeError):  # Event loop already closed
+            loop.call_soon_threadsafe(deliver, line, error)
+
+    threading.Thread(target=read_line, daemon=True).start()
+    return await future
+
+
+def _handle_tool_error(tool_name: str, error_msg: str) -> str:
+    """Report a failed tool call and return the message to send to the model."""
+
+    # Provide specific help for web search authentication errors
+    if "Authorization header with Bearer token is required" in error_msg:
+        print(f"    ❌ Error executing tool {tool_name}: {error_msg}")
+        print("    💡 Web search requires an Ollama API key. To enable web search:")
+        print("       1. Sign up at https://ollama.com/")
+        print("       2. Create an API key from your account")
+        print(
+            "       3. Set environment variable: "
+            'export OLLAMA_API_KEY="your_api_key"'
+        )
+        print("       4. Restart this application")
+        return (
+            "Web search unavailable - requires API key setup. See instructions above."
+        )
+
+    print(f"    ❌ Error executing tool {tool_name}: {error_msg}")
+    return error_msg
+
+
+async def run_conversation(
+    initial_question: str,
+    client: AsyncClient,
+    *,
+    tool_client: Client | None = None,
+    interactive: bool = False,
+    echo: bool = True,
+) -> str:
+    """Answer a question, executing tool calls until the model replies.
+
+    Args:
+        initial_question: The user's question that starts the conversation
+        client: Async Ollama client shared by all conversations
+        tool_client: Client whose web_search/web_fetch run the tool calls
+            (defaults to the SDK's module-level client)
+        interactive: Prompt for follow-up questions after each final answer
+        echo: Stream the model's thinking and response to stdout
+
+    Returns:
+        str: The model's last final answer (empty if none was produced)
+    """
+    # Tools allow the LLM to search and fetch web content; they are offered in
+    # a fixed order so the tool schema in every request is identical
+    ollama = _lazy_ollama()
+    import httpx  # Installed with the SDK, so also imported lazily
+
+    source = tool_client or ollama
+    tools = [getattr(source, name) for name in AVAILABLE_TOOLS]
+
+    # Callables for the tools, bound once; results are memoized so the model
+    # re-issuing the same call costs no network trip
+    web_search = memoize_json(source.web_search)
+    web_fetch = memoize_json(source.web_fetch)
+
+    def resolve_tool(name: str):
+        """Return the callable for a tool name, or None if it is unknown."""
+        if name == "web_search":
+            return web_search
+        if name == "web_fetch":
+            return web_fetch
+        return None
+
+    # Resolve the model once so every turn hits the same loaded model
+    model_name = os.getenv("OLLAMA_MODEL", "gpt-oss:20b")
+
+    # Initialize conversation history with the user's first message. This
+    # bounded deque maintains the conversation context for the LLM (appends
+    # never reallocate); the system prompt is kept outside it so it can never
+    # be evicted. Entries are frozen so earlier turns stay byte-identical for
+    # Ollama's prompt cache
+    system_message = freeze_message({"role": "system", "content": SYSTEM_PROMPT})
+    history: Deque[Mapping[str, Any]] = deque(
+        [freeze_message({"role": "user", "content": initial_question})],
+        maxlen=MAX_HISTORY_MESSAGES,
+    )
+    answer = ""
+
+    # Main conversation loop control variables
+    conversation_active = True
+    max_iterations = 10  # Safety limit to prevent infinite tool calling loops
+    iteration_count = 0
+
+    # Continue conversation until user quits or max iterations reached
+    while conversation_active and iteration_count < max_iterations:
+        iteration_count += 1
+
+        try:
+            print(f"\n--- Iteration {iteration_count} ---")
+
+            # Keep the prompt bounded before sending it again
+            messages = [system_message, *history]
+            compacted = await compact_history(
+                client, model=model_name, messages=messages
+            )
+            if compacted is not messages:
+                messages = compacted
+                history = deque(compacted[1:], maxlen=MAX_HISTORY_MESSAGES)
+
+            # Get LLM response using our normalized chat wrapper
+            # This handles the model's response and any tool calls it wants to make
+            response = await get_chat_response(
+                client,
+                model=model_name,  # Same model every turn keeps it loaded
+                messages=messages,  # System prompt plus conversation history
+                tools=tools,  # Available tools for LLM
+                think=True,  # Enable internal reasoning
+                echo=echo,  # Stream thinking and response to the user
+            )
+
+            # Extract the message from the response
+            message: Message = response.message
+            tool_calls = message.tool_calls
+
+            # Add the assistant's message to conversation history
+            # This maintains context for future turns in the conversation.
+            # An empty reply adds nothing, so it is left out and handled as
+            # an (empty) final answer below
+            if message.content or message.thinking or tool_calls:
+                history.append(
+                    freeze_message(message_to_dict(message, tool_calls=tool_calls))
+                )
+
+            # Process any tool calls the model wants to make
+            # Tools allow the model to search web, fetch content, etc.
+            if tool_calls:
+                print(f"🔧 Tool calls: {len(tool_calls)}")
+
+                # Look up the actual function for each requested tool
+                calls = [
+                    (tool_call, resolve_tool(tool_call.function.name))
+                    for tool_call in tool_calls
+                ]
+
+                # Start every known tool at once in worker threads so the
+                # turn takes as long as the slowest tool, not their sum
+                loop = asyncio.get_running_loop()
+                tasks = [
+                    (
+                        loop.run_in_executor(
+                            None,
+                            functools.partial(
+                                function_to_call, **tool_call.function.arguments
+                            ),
+                        )
+                        if function_to_call
+                        else None
+                    )
+                    for tool_call, function_to_call in calls
+                ]
+                warmup: asyncio.Task | None = None
+
+                try:
+                    # Report results in the order the model requested them
+                    for i, ((tool_call, _), task) in enumerate(zip(calls, tasks), 1):
+                        name = tool_call.function.name
+                        print(f"  Tool {i}: {name}")
+
+                        if task is not None:
+                            print(f"    Arguments: {tool_call.function.arguments}")
+                            try:
+                                result = await task
+                            except Exception as tool_error:
+                                # Still tell the model what happened
+                                content = _handle_tool_error(name, str(tool_error))
+                            else:
+                                # Show user a preview of the tool result
+                                preview = truncate_repr(result, PREVIEW_LIMIT)
+                                print(f"    ✅ Result (first 200 chars): {preview}...")
+
+                                # Pages are reduced to their visible text so the
+                                # prompt carries content rather than markup
+                                page = (
+                                    _result_content(result)
+                                    if name == "web_fetch"
+                                    else None
+                                )
+
+                                # Limit length to prevent context window overflow
+                                if page is not None:
+                                    page = extract_visible_text(page)
+                                    content = page[:TOOL_RESULT_LIMIT]
+                                else:
+                                    content = truncate_repr(result)
+                        else:
+                            # Handle case where model requests unknown tool
+                            content = f"Tool {name} not found"
+                            print(f"    ❌ {content}")
+
+                        # Add tool result to conversation for model to use
+                        history.append(
+                            freeze_message(
+                                {
+                                    "role": "tool",  # Mark as tool response
+                                    "content": content,
+                                    "tool_name": name,  # Which tool
+                                }
+                            )
+                        )
+
+                        # While later tools are still running, have the server
+                        # process the prompt known so far; the next request
+                        # only extends it, so its prefill reuses that work.
+                        # Skipped if the remaining results could push the
+                        # history over budget, as compaction would then rewrite
+                        # the prefix before the next request
+                        prefix = [system_message, *history]
+                        if (
+                            SPECULATIVE_PREFILL
+                            and any(
+                                pending is not None and not pending.done()
+                                for pending in tasks[i:]
+                            )
+                            and history_chars(prefix)
+                            + len(tasks[i:]) * TOOL_RESULT_LIMIT
+                            <= HISTORY_CHAR_BUDGET
+                        ):
+                            if warmup is not None:
+                                warmup.cancel()  # Superseded by a longer prefix
+                            warmup = asyncio.create_task(
+                                prefill_prompt(
+                                    client,
+                                    model=model_name,
+                                    messages=prefix,
+                                    tools=tools,
+                                    think=True,
+                                )
+                            )
+
+                    # Let the last warm-up finish so the real request lands on
+                    # the server slot that already holds the cached prefix
+                    if warmup is not None:
+                        await warmup
+                finally:
+                    if warmup is not None:
+                        warmup.cancel()
+            else:
+                # No tool calls means model gave a final answer
+                answer = message.content or ""
+                if not interactive:
+                    break
+
+                # Ask user if they want to continue the conversation
+                print(
+                    "\n🎯 Final response received. Would you like to ask another question?"
+                )
+
+                # Get user's next input or exit
+                user_input = (
+                    await _ainput(
+                        "\nEnter your next question (or 'quit'/'exit' to stop): "
+                    )
+                ).strip()
+
+                # Check if user wants to quit
+                if user_input.lower() in ["quit", "exit", "q", ""]:
+                    conversation_active = False
+                    print("👋 Conversation ended.")
+                else:
+                    # Add new user message and reset iteration counter
+                    # Reset counter allows new question to have full iterations
+                    history.append(
+                        freeze_message({"role": "user", "content": user_input})
+                    )
+                    iteration_count = 0  # Reset for new question
+
+        except (ollama.ResponseError, ollama.RequestError) as api_error:
+            # Handle Ollama API specific errors (model not found, etc.)
+            print(f"❌ Ollama API Error: {api_error}")
+            print("Please check that Ollama is running and the model is available.")
+            break  # Exit conversation loop but not the program
+
+        except httpx.TimeoutException:
+            # The server did not answer within OLLAMA_TIMEOUT seconds
+            print(f"❌ Ollama API Error: no response within {CLIENT_TIMEOUT:g}s.")
+            print("Raise or unset OLLAMA_TIMEOUT if the model is slow to load.")
+            break
+
+    return answer
+
+
+async def run_batch(questions: List[str], *, interactive: bool = False) -> List[str]:
+    """Answer several independent questions concurrently.
 
-    return cast(ChatResponse, last_with_message)
+    Each question runs as its own conversation over one shared AsyncClient, so
+    total wall time approaches that of the slowest question. How many requests
+    the server actually processes at once is bounded by OLLAMA_NUM_PARALLEL.
 
+    Args:
+        questions: Questions to answer, one conversation each
+        interactive: Prompt for follow-up questions (single question only)
 
-def main():
+    Returns:
+        List[str]: Final answers in the same order as ``questions``
+    """
+    ollama = _lazy_ollama()
+
+    # Create the clients once so every chat request and tool call reuses their
+    # pooled keep-alive connections instead of reconnecting each turn
+    host = os.getenv("OLLAMA_HOST")
+    client = ollama.AsyncClient(host=host, timeout=CLIENT_TIMEOUT)
+    tool_client = ollama.Client(
+        host=host, timeout=CLIENT_TIMEOUT, http2=HTTP2_AVAILABLE
+    )
+
+    # Interleaved token streams from several conversations would be unreadable
+    echo = len(questions) == 1
+
+    return list(
+        await asyncio.gather(
+            *(
+                run_conversation(
+                    question,
+                    client,
+                    tool_client=tool_client,
+                    interactive=interactive,
+                    echo=echo,
+                )
+                for question in questions
+            )
+        )
+    )
+
+
+async def main(argv: List[str] | None = None):
     """Main function to run the Ollama agent with web search capabilities.
 
     This function orchestrates the entire conversation flow:
-    1. Sets up available tools (web search and web fetch)
-    2. Gets initial user question
-    3. Runs conversation loop with LLM and tool calls
+    1. Parses command-line questions for non-interactive batch mode
+    2. Gets initial user question when none were given
+    3. Runs the conversation(s) with LLM and tool calls
     4. Handles errors gracefully with user-friendly messages
 
+    Args:
+        argv: Command-line arguments (defaults to sys.argv[1:])
+
     Returns:
         int: Exit code (0 for success, 1 for errors)
     """
-    # Dictionary mapping tool names to their callable functions
-    # These tools allow the LLM to search and fetch web content
-    available_tools = {tool.__name__: tool for tool in AVAILABLE_TOOLS}
+    parser = argparse.ArgumentParser(description="Ollama agent with web search")
+    parser.add_argument(
+        "questions",
+        nargs="*",
+        help="questions to answer concurrently without prompting (batch mode)",
+    )
+    args = parser.parse_args(argv)
+
+    # Emoji output needs UTF-8; legacy console code pages would garble it
+    if hasattr(sys.stdout, "reconfigure"):
+        with contextlib.suppress(ValueError, OSError):
+            sys.stdout.reconfigure(encoding="utf-8")
 
     # Display welcome message and instructions
     print("Ollama Agent with Web Search")
-    print("Type 'quit' or 'exit' to stop the conversation")
+    if not args.questions:
+        print("Type 'quit' or 'exit' to stop the conversation")
 
     # Display model configuration
     model_name = os.getenv("OLLAMA_MODEL", "gpt-oss:20b")
@@ -178,182 +1184,32 @@ def main():
 
     print("-" * 50)
 
-    # Get the initial question from user (or use default)
-    initial_question = input(
-        "Enter your question (or press Enter for default): "
-    ).strip()
-    if not initial_question:
-        initial_question = "what are the latest developments in AI?"
-
-    # Initialize conversation history with the user's first message
-    # This list maintains the full conversation context for the LLM
-    messages: List[Dict[str, Any]] = [{"role": "user", "content": initial_question}]
-
     try:
-        # Main conversation loop control variables
-        conversation_active = True
-        max_iterations = 10  # Safety limit to prevent infinite tool calling loops
-        iteration_count = 0
-
-        # Continue conversation until user quits or max iterations reached
-        while conversation_active and iteration_count < max_iterations:
-            iteration_count += 1
-
-            try:
-                print(f"\n--- Iteration {iteration_count} ---")
-
-                # Get model name from environment variable with fallback
-                model_name = os.getenv("OLLAMA_MODEL", "gpt-oss:20b")
-
-                # Get LLM response using our normalized chat wrapper
-                # This handles the model's response and any tool calls it wants to make
-                response = get_chat_response(
-                    model=model_name,  # Ollama model name from env or default
-                    messages=messages,  # Full conversation history
-                    tools=AVAILABLE_TOOLS,  # Available tools for LLM
-                    think=True,  # Enable internal reasoning
+        if args.questions:
+            # Batch mode: answer every question concurrently, then report
+            answers = await run_batch(args.questions)
+            if len(args.questions) > 1:
+                _, response_label, question_label = _echo_labels()
+                sys.stdout.write(
+                    "".join(
+                        f"\n{question_label} {question}\n{response_label} {answer}\n"
+                        for question, answer in zip(args.questions, answers)
+                    )
                 )
+            return 0
 
-                # Extract the message from the response
-                message: Message = response.message  # type: ignore[attr-defined]
+        # Start loading the model while the user is still typing
+        warmup = asyncio.create_task(warm_model(model_name))
 
-                # Show the model's internal thinking process (if enabled)
-                # This helps users understand how the model reasons through problems
-                if hasattr(message, "thinking") and message.thinking:
-                    print(f"🤔 Thinking: {message.thinking}")
+        # Get the initial question from user (or use default)
+        initial_question = (
+            await _ainput("Enter your question (or press Enter for default): ")
+        ).strip()
+        if not initial_question:
+            initial_question = "what are the latest developments in AI?"
 
-                # Display the model's main response to the user
-                if hasattr(message, "content") and message.content:
-                    print(f"💬 Response: {message.content}")
-
-                # Add the assistant's message to conversation history
-                # This maintains context for future turns in the conversation
-                messages.append(message_to_dict(message))
-
-                # Process any tool calls the model wants to make
-                # Tools allow the model to search web, fetch content, etc.
-                if hasattr(message, "tool_calls") and message.tool_calls:
-                    print(f"🔧 Tool calls: {len(message.tool_calls)}")
-
-                    # Execute each tool call requested by the model
-                    for i, tool_call in enumerate(message.tool_calls, 1):
-                        print(f"  Tool {i}: {tool_call.function.name}")
-
-                        # Look up the actual function to call
-                        function_to_call = available_tools.get(tool_call.function.name)
-
-                        if function_to_call:
-                            try:
-                                # Extract arguments and call the tool function
-                                args = tool_call.function.arguments
-                                print(f"    Arguments: {args}")
-                                result = function_to_call(**args)
-
-                                # Show user a preview of the tool result
-                                result_str = str(result)
-                                print(
-                                    f"    ✅ Result (first 200 chars): {result_str[:200]}..."
-                                )
-
-                                # Add tool result to conversation for model to use
-                                # Limit length to prevent context window overflow
-                                messages.append(
-                                    {
-                                        "role": "tool",  # Mark as tool response
-                                        "content": result_str[
-                                            :8000
-                                        ],  # Truncate long results
-                                        "tool_name": tool_call.function.name,  # Which tool
-                                    }
-                                )
-
-                            except (
-                                ConnectionError,  # Network issues
-                                TimeoutError,  # Request timeouts
-                                ValueError,  # Invalid arguments
-                                RuntimeError,  # Other runtime issues
-                            ) as tool_error:
-                                # Handle tool execution errors gracefully
-                                error_msg = str(tool_error)
-
-                                # Provide specific help for web search authentication errors
-                                if (
-                                    "Authorization header with Bearer token is required"
-                                    in error_msg
-                                ):
-                                    print(
-                                        f"    ❌ Error executing tool "
-                                        f"{tool_call.function.name}: {error_msg}"
-                                    )
-                                    print(
-                                        "    💡 Web search requires an Ollama API key. "
-                                        "To enable web search:"
-                                    )
-                                    print("       1. Sign up at https://ollama.com/")
-                                    print(
-                                        "       2. Create an API key from your account"
-                                    )
-                                    print(
-                                        "       3. Set environment variable: "
-                                        'export OLLAMA_API_KEY="your_api_key"'
-                                    )
-                                    print("       4. Restart this application")
-                                    error_msg = (
-                                        "Web search unavailable - requires API key setup. "
-                                        "See instructions above."
-                                    )
-                                else:
-                                    print(
-                                        f"    ❌ Error executing tool "
-                                        f"{tool_call.function.name}: {error_msg}"
-                                    )
-
-                                # Still add error to conversation so model knows what happened
-                                messages.append(
-                                    {
-                                        "role": "tool",
-                                        "content": error_msg,
-                                        "tool_name": tool_call.function.name,
-                                    }
-                                )
-                        else:
-                            # Handle case where model requests unknown tool
-                            error_msg = f"Tool {tool_call.function.name} not found"
-                            print(f"    ❌ {error_msg}")
-                            messages.append(
-                                {
-                                    "role": "tool",
-                                    "content": error_msg,
-                                    "tool_name": tool_call.function.name,
-                                }
-                            )
-                else:
-                    # No tool calls means model gave a final answer
-                    # Ask user if they want to continue the conversation
-                    print(
-                        "\n🎯 Final response received. Would you like to ask another question?"
-                    )
-
-                    # Get user's next input or exit
-                    user_input = input(
-                        "\nEnter your next question (or 'quit'/'exit' to stop): "
-                    ).strip()
-
-                    # Check if user wants to quit
-                    if user_input.lower() in ["quit", "exit", "q", ""]:
-                        conversation_active = False
-                        print("👋 Conversation ended.")
-                    else:
-                        # Add new user message and reset iteration counter
-                        # Reset counter allows new question to have full iterations
-                        messages.append({"role": "user", "content": user_input})
-                        iteration_count = 0  # Reset for new question
-
-            except (ResponseError, RequestError) as api_error:
-                # Handle Ollama API specific errors (model not found, etc.)
-                print(f"❌ Ollama API Error: {api_error}")
-                print("Please check that Ollama is running and the model is available.")
-                break  # Exit conversation loop but not the program
+        await warmup
+        await run_batch([initial_question], interactive=True)
 
     except ConnectionError:
         # Handle case where Ollama service is not running
@@ -362,11 +1218,6 @@ def main():
         print("Visit https://ollama.com/download for installation instructions.")
         return 1  # Exit with error code
 
-    except KeyboardInterrupt:
-        # Handle Ctrl+C gracefully
-        print("\n👋 Conversation interrupted by user.")
-        return 0  # Normal exit
-
     except (RuntimeError, ValueError) as e:
         # Handle other runtime errors
         print(f"❌ Runtime error: {e}")
@@ -378,4 +1229,9 @@ def main():
 if __name__ == "__main__":
     # Entry point: run main() and exit with its return code
     # This allows the script to be run directly or imported as a module
-    sys.exit(main())
+    try:
+        sys.exit(asyncio.run(main()))
+    except KeyboardInterrupt:
+        # Handle Ctrl+C gracefully; asyncio.run() cancels main() and re-raises
+        print("\n👋 Conversation interrupted by user.")
+        sys.exit(0)  # Normal exit